@@ -1,7 +1,11 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-from .superscription import Superscription
+from .superscription import Superscription, RequestTemplate
+from .sharding import ShardedSuperscription
+from .verification import VerificationTracker
+from .transport import RecordingTransport, ReplayTransport
+from .scheduler import Scheduler, DeadlineExceeded, INTERACTIVE, NORMAL, BULK
 
 __author__ = 'Shrikant Joshi'
 __email__ = 'shrikant.j@gmail.com'
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+superscription.scheduler
+~~~~~~~~~~~~~~~~~~~~~~~~
+Run requests from a pool of worker threads, by priority.
+
+Requests are submitted with a priority class: ``interactive``, ``normal`` or
+``bulk``. Workers always pick the highest class with work waiting, each class
+may only use its share of the workers, and one worker is always kept free for
+interactive calls, so a large bulk job can't hold them up. Requests still queued
+when their deadline passes are dropped instead of sent.
+
+:copyright: (c) 2014 Shrikant Joshi
+:license: BSD, See LICENSE for more details.
+"""
+
+import collections
+import copy
+import heapq
+import itertools
+import threading
+import time
+
+from .superscription import ALLOWED_MODES
+
+
+INTERACTIVE         = "interactive"
+NORMAL              = "normal"
+BULK                = "bulk"
+PRIORITIES          = (INTERACTIVE, NORMAL, BULK)
+DEFAULT_SHARES      = {
+                        INTERACTIVE     : 1.0,
+                        NORMAL          : 0.5,
+                        BULK            : 0.25,
+                    }
+
+
+class DeadlineExceeded(RuntimeError):
+    """Raised by `Job.result` for a job dropped because its deadline passed before it could be sent"""
+
+
+class Job(object):
+    """A request submitted to a `Scheduler`.
+
+    Once done, `response` holds the response (if any) and `result` returns True/False like the
+    request methods, or raises the exception the request raised.
+    """
+
+    def __init__(self, hub_mode, priority, deadline, kwargs):
+        self.hub_mode       = hub_mode
+        self.priority       = priority
+        self.deadline       = deadline
+        self.kwargs         = kwargs
+        self.response       = None
+        self.submitted_at   = time.time()
+        self.started_at     = None
+        self.finished_at    = None
+        self._result        = None
+        self._exception     = None
+        self._done          = threading.Event()
+
+
+    def _finish(self, result=None, exception=None, response=None):
+        self._result        = result
+        self._exception     = exception
+        self.response       = response
+        self.finished_at    = time.time()
+        self._done.set()
+
+
+    def done(self):
+        return self._done.is_set()
+
+
+    def wait(self, timeout=None):
+        """Block until the job is done, or :param float timeout: seconds elapse. Returns whether it is done."""
+        self._done.wait(timeout)
+        return self._done.is_set()
+
+
+    def result(self, timeout=None):
+        """Block until the job is done and return its result, or raise its exception.
+
+        Raises `RuntimeError` if it isn't done after :param float timeout: seconds.
+        """
+        if not self.wait(timeout):
+            raise RuntimeError("The %s request didn't complete within %s seconds" % (self.hub_mode, timeout))
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class Scheduler(object):
+    """Send the requests of a client from a pool of worker threads, by priority.
+
+    Usage:
+    >>> scheduler = Scheduler(Superscription(username='demo', password='demo'), workers=8)
+    >>> for topic in topics:
+    ...     scheduler.submit('subscribe', priority=BULK, hub_topic=topic, hub_callback='http://my.domain.tld/callback', hub_secret='RandomHubSecret')
+    >>> scheduler.submit('retrieve', priority=INTERACTIVE, deadline=time.time() + 5, hub_topic='http://push-pub.appspot.com/feed').result()
+    True
+    """
+
+    def __init__(self, client, workers=4, shares=None):
+        """Start the worker threads.
+
+        :param client: The ``Superscription`` (or ``ShardedSuperscription``) sending the requests. Each
+            worker uses its own copy of it.
+        :param int workers: Number of worker threads, i.e. of requests sent concurrently. At least 2,
+            since one worker is always kept free for interactive requests.
+        :param dict shares: Priority class -> fraction of the workers it may use at once, at least one
+            worker. Defaults to `DEFAULT_SHARES`. Whatever the shares, the `NORMAL` and `BULK` requests
+            together never use more than ``workers - 1`` workers.
+        .. versionadded:: 0.2.0
+        """
+        shares = dict(DEFAULT_SHARES, **(shares or {}))
+        if set(shares) - set(PRIORITIES):
+            raise ValueError("Priority classes must be one of: %s" % ", ".join(PRIORITIES))
+        if workers < 2:
+            raise ValueError("A scheduler needs at least 2 workers, one of them being kept for interactive requests!")
+
+        self.client         = client
+        self.background     = workers - 1
+        self.limits         = dict((priority, max(1, int(share * workers))) for priority, share in shares.items())
+        for priority in (NORMAL, BULK):
+            self.limits[priority] = min(self.limits[priority], self.background)
+
+        self._queues        = dict((priority, collections.deque()) for priority in PRIORITIES)
+        self._queued        = dict((priority, 0) for priority in PRIORITIES)
+        self._running       = dict((priority, 0) for priority in PRIORITIES)
+        self._deadlines     = []
+        self._live          = 0
+        self._sequence      = itertools.count()
+        self._lock          = threading.Lock()
+        self._condition     = threading.Condition(self._lock)
+        self._reaper        = threading.Condition(self._lock)
+        self._shutdown      = False
+        self._threads       = [threading.Thread(target=self._work, args=(copy.copy(client),)) for _ in range(workers)]
+        self._threads.append(threading.Thread(target=self._reap))
+        for thread in self._threads:
+            thread.daemon = True
+            thread.start()
+
+
+    def submit(self, hub_mode, priority=NORMAL, deadline=None, **kwargs):
+        """Queue a request and return its `Job`.
+
+        :param string hub_mode: One of the `ALLOWED_MODES`, or `send` for a ``RequestTemplate``.
+        :param string priority: One of `INTERACTIVE`, `NORMAL` or `BULK`.
+        :param float deadline: If given, a ``time.time()`` value after which the request is dropped
+            rather than sent. The job then raises `DeadlineExceeded`, as soon as the deadline passes.
+        Keyword arguments are passed on to the client method, e.g. `hub_topic`, `hub_callback`.
+        """
+        if hub_mode not in ALLOWED_MODES and hub_mode != "send":
+            raise AttributeError("hub_mode must be one of: %s" % str(ALLOWED_MODES.keys() + ["send"]))
+        if priority not in self._queues:
+            raise ValueError("priority must be one of: %s" % ", ".join(PRIORITIES))
+
+        job = Job(hub_mode, priority, deadline, kwargs)
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit requests to a scheduler which has been shut down!")
+            self._queues[priority].append(job)
+            self._queued[priority] += 1
+            if deadline is not None:
+                self._live += 1
+                heapq.heappush(self._deadlines, (deadline, next(self._sequence), job))
+                if self._deadlines[0][2] is job:
+                    self._reaper.notify()
+            self._condition.notify()
+        return job
+
+
+    def _expire(self, now):
+        """Drop the queued jobs past their deadline. Expired jobs are skipped when they reach the queue head."""
+        while self._deadlines and (self._deadlines[0][0] < now or self._deadlines[0][2].started_at is not None):
+            job = heapq.heappop(self._deadlines)[2]
+            if job.started_at is None:
+                self._live -= 1
+                self._queued[job.priority] -= 1
+                job._finish(exception=DeadlineExceeded("The %s request was dropped past its deadline" % job.hub_mode))
+
+
+    def _started(self, job):
+        """Forget the deadline of a job which started, so the heap doesn't keep finished jobs alive.
+
+        Started jobs are popped as they reach the top of the heap, and the heap is rebuilt whenever less
+        than half of it is still live.
+        """
+        self._live -= 1
+        if len(self._deadlines) > 2 * self._live:
+            self._deadlines = [entry for entry in self._deadlines if entry[2].started_at is None]
+            heapq.heapify(self._deadlines)
+
+
+    def _drained(self):
+        return self._shutdown and not any(self._queued.values())
+
+
+    def _next_job(self):
+        """Take the next job to run, or return None once shut down and drained"""
+        with self._lock:
+            while True:
+                now = time.time()
+                self._expire(now)
+                background = sum(self._running[priority] for priority in (NORMAL, BULK))
+                for priority in PRIORITIES:
+                    queue = self._queues[priority]
+                    while queue and queue[0].done():
+                        queue.popleft()
+                    if not queue or self._running[priority] >= self.limits[priority]:
+                        continue
+                    if priority != INTERACTIVE and background >= self.background:
+                        continue
+
+                    job = queue.popleft()
+                    job.started_at = now
+                    self._queued[priority] -= 1
+                    self._running[priority] += 1
+                    if job.deadline is not None:
+                        self._started(job)
+                    return job
+
+                if self._drained():
+                    self._reaper.notify()
+                    return None
+                self._condition.wait()
+
+
+    def _work(self, client):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            try:
+                result = getattr(client, job.hub_mode)(**job.kwargs)
+                job._finish(result=result, response=getattr(client, 'response', None))
+            except Exception as e:
+                job._finish(exception=e, response=getattr(client, 'response', None))
+            finally:
+                client.response = None
+                with self._lock:
+                    self._running[job.priority] -= 1
+                    self._condition.notify_all()
+
+
+    def _reap(self):
+        """Drop jobs as their deadline passes, even while no worker is free to notice"""
+        with self._lock:
+            while not self._drained():
+                self._expire(time.time())
+                timeout = max(0, self._deadlines[0][0] - time.time()) if self._deadlines else None
+                self._reaper.wait(timeout)
+
+
+    def pending(self, priority=None):
+        """Number of queued requests, for :param string priority: or for all classes"""
+        with self._lock:
+            if priority:
+                return self._queued[priority]
+            return sum(self._queued.values())
+
+
+    def shutdown(self, wait=True):
+        """Stop accepting requests. Queued requests are still sent; :param bool wait: for them to be."""
+        with self._lock:
+            self._shutdown = True
+            self._condition.notify_all()
+            self._reaper.notify()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
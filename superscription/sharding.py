@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+superscription.sharding
+~~~~~~~~~~~~~~~~~~~~~~~
+Spread subscriptions across several Superfeedr accounts.
+
+Every Superfeedr account has its own rate budget, so the aggregate throughput
+grows with the number of accounts. Each ``hub_topic`` is assigned to exactly one
+account using a consistent-hash ring keyed on the account username: the
+assignment is stable across restarts and adding an account only moves roughly
+``1/N`` of the topics to it.
+
+:copyright: (c) 2014 Shrikant Joshi
+:license: BSD, See LICENSE for more details.
+"""
+
+import bisect
+import copy
+import hashlib
+import threading
+
+from .superscription import Superscription, http_transport
+
+
+DEFAULT_REPLICAS    = 100
+
+
+def _hash(key):
+    """Stable 32-bit hash of a string (unlike ``hash()``, identical across processes)"""
+    if isinstance(key, unicode):
+        key = key.encode('utf-8')
+    return int(hashlib.md5(key).hexdigest()[:8], 16)
+
+
+class ShardedSuperscription(object):
+    """Route Superscription calls over a set of Superfeedr accounts.
+
+    Single-topic calls (``subscribe``, ``unsubscribe``, ``retrieve``) go to the
+    account owning the topic. Bulk and read calls run against all accounts in
+    parallel, one thread per account, so each account's calls stay serial.
+
+    Usage:
+    >>> sharded = ShardedSuperscription([('alice', None, 'token-a'), ('bob', None, 'token-b')])
+    >>> sharded.bulk_subscribe(['http://push-pub.appspot.com/feed'], 'http://my.domain.tld/callback', hub_secret='RandomHubSecret')
+    {'http://push-pub.appspot.com/feed': True}
+    """
+
+    def __init__(self, credentials, replicas=DEFAULT_REPLICAS, transport=http_transport):
+        """Initialize a sharded client.
+
+        :param list credentials: Iterable of ``(username, password, token)`` tuples, or dicts with the
+            same keys, one per Superfeedr account. Usernames must be unique.
+        :param int replicas: Number of points each account gets on the hash ring. More points give a
+            more even spread of topics.
+        :param callable transport: The transport used by every account, see ``Superscription``.
+        .. versionadded:: 0.2.0
+        """
+        self.clients    = {}
+        self.replicas   = replicas
+        self._ring      = []
+        self._owners    = {}
+
+        for credential in credentials:
+            if isinstance(credential, dict):
+                client = Superscription(**dict(dict(transport=transport), **credential))
+            else:
+                client = Superscription(*credential, transport=transport)
+            self.add_client(client)
+
+        if not self.clients:
+            raise AttributeError("You must provide credentials for at least one Superfeedr account!")
+
+
+    def __copy__(self):
+        """Copy with copies of the account clients, so the copy can be used from another thread."""
+        clone           = ShardedSuperscription.__new__(ShardedSuperscription)
+        clone.__dict__.update(self.__dict__)
+        clone.clients   = dict((username, copy.copy(client)) for username, client in self.clients.items())
+        clone._ring     = list(self._ring)
+        clone._owners   = dict(self._owners)
+        return clone
+
+
+    def add_client(self, client):
+        """Add a ``Superscription`` client (i.e. an account) to the hash ring."""
+        if client.username in self.clients:
+            raise ValueError("Duplicate Superfeedr account: %s" % client.username)
+
+        self.clients[client.username] = client
+        for replica in range(self.replicas):
+            point = _hash("%s#%d" % (client.username, replica))
+            self._owners[point] = client.username
+            bisect.insort(self._ring, point)
+
+
+    def client_for(self, hub_topic):
+        """Return the ``Superscription`` client owning :param string hub_topic:"""
+        index = bisect.bisect(self._ring, _hash(hub_topic)) % len(self._ring)
+        return self.clients[self._owners[self._ring[index]]]
+
+
+    def shard(self, hub_topics):
+        """Group :param list hub_topics: by owning account. Returns a dict of username -> list of topics."""
+        shards = {}
+        for hub_topic in hub_topics:
+            shards.setdefault(self.client_for(hub_topic).username, []).append(hub_topic)
+        return shards
+
+
+    def _delegate(self, hub_mode, hub_topic, *args, **kwargs):
+        client          = self.client_for(hub_topic)
+        self.hub_mode   = hub_mode
+        self.hub_topic  = hub_topic
+        try:
+            return getattr(client, hub_mode)(hub_topic, *args, **kwargs)
+        finally:
+            self.response = getattr(client, 'response', None)
+
+
+    def subscribe(self, hub_topic, hub_callback, hub_secret=None, hub_verify=None, retrieve=None):
+        """Subscribe to :param string hub_topic: using the account that owns it. See ``Superscription.subscribe``."""
+        return self._delegate("subscribe", hub_topic, hub_callback, hub_secret=hub_secret, hub_verify=hub_verify, retrieve=retrieve)
+
+
+    def unsubscribe(self, hub_topic, hub_callback=None, hub_secret=None, hub_verify=None):
+        """Unsubscribe :param string hub_topic: using the account that owns it. See ``Superscription.unsubscribe``."""
+        return self._delegate("unsubscribe", hub_topic, hub_callback=hub_callback, hub_secret=hub_secret, hub_verify=hub_verify)
+
+
+    def retrieve(self, hub_topic, count=None, before=None, after=None, fmt=None, callback=None):
+        """Retrieve entries for :param string hub_topic: from the account that owns it. See ``Superscription.retrieve``."""
+        return self._delegate("retrieve", hub_topic, count=count, before=before, after=after, fmt=fmt, callback=callback)
+
+
+    def _run_parallel(self, jobs):
+        """Run ``jobs`` (a dict of username -> callable taking the client) with one thread per account.
+
+        Exceptions are collected rather than raised, keyed the same way as the returned results.
+        """
+        results = {}
+        errors  = {}
+
+        def run(username, job):
+            try:
+                results[username] = job(self.clients[username])
+            except Exception as e:
+                errors[username] = e
+
+        threads = [threading.Thread(target=run, args=(username, job)) for username, job in jobs.items()]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results, errors
+
+
+    def _bulk(self, hub_mode, hub_topics, **kwargs):
+        """Call ``hub_mode`` for every topic, running each account's share in parallel.
+
+        The shared keyword arguments are validated and encoded once, into a ``RequestTemplate``.
+
+        Returns a dict of hub_topic -> True/False. The ``responses`` and ``errors`` attributes are
+        populated with dicts of hub_topic -> response and hub_topic -> exception, respectively; topics
+        that raised are absent from the returned results.
+        """
+        self.hub_mode   = hub_mode
+        self.responses  = responses = {}
+        self.errors     = errors = {}
+        template        = next(self.clients.itervalues()).template(hub_mode, **kwargs)
+
+        def make_job(topics):
+            def job(client):
+                results = {}
+                for hub_topic in topics:
+                    try:
+                        results[hub_topic] = client.send(template, hub_topic=hub_topic)
+                    except Exception as e:
+                        errors[hub_topic] = e
+                    responses[hub_topic] = getattr(client, 'response', None)
+                    client.response = None
+                return results
+            return job
+
+        jobs            = dict((username, make_job(topics)) for username, topics in self.shard(hub_topics).items())
+        shard_results, _ = self._run_parallel(jobs)
+
+        results = {}
+        for shard_result in shard_results.values():
+            results.update(shard_result)
+        return results
+
+
+    def bulk_subscribe(self, hub_topics, hub_callback, hub_secret=None, hub_verify=None, retrieve=None):
+        """Subscribe every topic in :param list hub_topics: to :param string hub_callback:, accounts in parallel."""
+        return self._bulk("subscribe", hub_topics, hub_callback=hub_callback, hub_secret=hub_secret, hub_verify=hub_verify, retrieve=retrieve)
+
+
+    def bulk_unsubscribe(self, hub_topics, hub_callback=None, hub_secret=None, hub_verify=None):
+        """Unsubscribe every topic in :param list hub_topics:, accounts in parallel."""
+        return self._bulk("unsubscribe", hub_topics, hub_callback=hub_callback, hub_secret=hub_secret, hub_verify=hub_verify)
+
+
+    def bulk_retrieve(self, hub_topics, count=None, before=None, after=None, fmt=None, callback=None):
+        """Retrieve entries for every topic in :param list hub_topics:, accounts in parallel."""
+        return self._bulk("retrieve", hub_topics, count=count, before=before, after=after, fmt=fmt, callback=callback)
+
+
+    def list(self, hub_callback, page=None):
+        """List the subscriptions of :param string hub_callback: on every account, in parallel.
+
+        Returns a dict of username -> True/False. The ``responses`` and ``errors`` attributes are
+        populated with dicts of username -> response and username -> exception, respectively.
+        """
+        self.hub_mode   = "list"
+
+        def job(client):
+            try:
+                return client.list(hub_callback, page=page)
+            finally:
+                responses[client.username] = getattr(client, 'response', None)
+
+        self.responses  = responses = {}
+        results, self.errors = self._run_parallel(dict((username, job) for username in self.clients))
+        return results
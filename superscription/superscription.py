@@ -24,6 +24,7 @@ What do YOU want it to do?
 :license: BSD, See LICENSE for more details.
 """
 
+import urllib
 import warnings
 import urlparse
 import requests
@@ -49,8 +50,125 @@ ALLOWED_PARAMS      = {
                         "before"        : "before", 
                         "after"         : "after",
                         "fmt"           : "format",
+                        "callback"      : "callback",
                     }
 
+
+def http_transport(hub_mode, payload, auth):
+    """Send a request to the Superfeedr API over HTTP, using ``requests``. This is the default transport.
+
+    A transport is any callable with this signature returning a `requests.Response`; see
+    `superscription.transport` for ones which record and replay requests.
+    """
+    return ALLOWED_MODES[hub_mode](SUPERFEEDR_API_URL, 
+                                    params=payload, 
+                                    auth=auth, 
+                                    # headers={'Accept': 'application/json'}
+                            )
+
+
+REQUIRED_PARAMS     = {
+                        'subscribe'     : ("hub_topic", "hub_callback"),
+                        'unsubscribe'   : ("hub_topic",),
+                        'list'          : ("hub_callback",),
+                        'retrieve'      : ("hub_topic",),
+                    }
+
+
+def _check_hub_verify(kwargs):
+    """Raise `ValueError` if the `hub_verify` keyword argument is set to anything but 'sync' or 'async'"""
+    hub_verify = kwargs.get("hub_verify", None)
+    if hub_verify and hub_verify not in ["sync", "async"]:
+        raise ValueError("If defined, hub_verify can only accept 'sync' or 'async' as values!")
+
+
+def _filter_params(kwargs):
+    """Map keyword arguments to request parameters.
+
+    Arguments with a falsy value (None, '', 0, False) are left out. Returns the dict of parameters
+    and the list of arguments which aren't in `ALLOWED_PARAMS`, if any.
+    """
+    params  = {}
+    extra   = []
+    for key, value in kwargs.iteritems():
+        if key not in ALLOWED_PARAMS:
+            extra.append(key)
+        elif value:
+            params[ALLOWED_PARAMS[key]] = value
+    return params, extra
+
+
+class RequestTemplate(object):
+    """Pre-validated, pre-encoded request parameters shared by many requests.
+
+    In bulk runs the mode, format, callback, secret and verification mode rarely change between
+    requests. A template checks them and encodes them into a query string once, so each request
+    only has to append its own (e.g. `hub_topic`) values.
+
+    Usage:
+    >>> template = RequestTemplate('subscribe', hub_callback='http://my.domain.tld/callback', hub_secret='RandomHubSecret')
+    >>> template.encode(hub_topic='http://push-pub.appspot.com/feed')
+    'format=json&hub.callback=http%3A%2F%2Fmy.domain.tld%2Fcallback&hub.mode=subscribe&hub.secret=RandomHubSecret&hub.topic=http%3A%2F%2Fpush-pub.appspot.com%2Ffeed'
+    """
+
+    def __init__(self, hub_mode, fmt="json", **kwargs):
+        """Validate & encode the fixed parameters of the template.
+
+        :param string hub_mode: MUST be one of the `ALLOWED_MODES`
+        :param string fmt: `json` or `atom`. Same as for the request methods.
+        Keyword arguments are the same as for the request methods; those with a falsy value are left
+        out, as for the request methods, and can be given per request instead.
+        .. versionadded:: 0.2.0
+        """
+        if hub_mode not in ALLOWED_MODES:
+            raise AttributeError("hub_mode must be one of: %s" % str(ALLOWED_MODES.keys()))
+
+        _check_hub_verify(kwargs)
+
+        fixed, extra = _filter_params(dict(kwargs, fmt=fmt))
+        fixed['hub.mode'] = hub_mode
+
+        if extra:
+            warn_msg = "Extra arguments passed in function call: %s" % ", ".join(extra)
+            warnings.warn(warn_msg, RuntimeWarning)
+
+        self.hub_mode   = hub_mode
+        self.fixed      = fixed
+        self.query      = urllib.urlencode(sorted((pkey, self._str(value)) for pkey, value in fixed.iteritems()))
+
+        # Encoded "key=" prefixes of the parameters which are still free to set per request
+        self._prefixes  = dict((key, "&%s=" % urllib.quote_plus(pkey)) for key, pkey in ALLOWED_PARAMS.iteritems()
+                                                                      if pkey not in fixed)
+
+
+    @staticmethod
+    def _str(value):
+        if isinstance(value, unicode):
+            return value.encode('utf-8')
+        return str(value)
+
+
+    def encode(self, **kwargs):
+        """Return the query string for a request, adding the per-request keyword arguments to the fixed ones.
+
+        Keyword arguments with a falsy value are ignored, as in the request methods. Raises `TypeError` for
+        arguments which are unknown or already fixed by the template, and `ValueError` for an invalid
+        `hub_verify`.
+        """
+        _check_hub_verify(kwargs)
+        parts = [self.query]
+        for key, value in kwargs.iteritems():
+            if not value:
+                continue
+            try:
+                prefix = self._prefixes[key]
+            except KeyError:
+                raise TypeError("'%s' is unknown or already set by the template" % key)
+            parts.append(prefix)
+            parts.append(urllib.quote_plus(self._str(value)))
+        return "".join(parts)
+
+
 class Superscription(object):
     """A super-thin wrapper around the Superfeedr PuSH API. Documentation at:
         http://documentation.superfeedr.com/
@@ -62,7 +180,7 @@ class Superscription(object):
     >>> superscription = Superscription(username='demo', password='demo')
     """
 
-    def __init__(self, username, password=None, token=None):
+    def __init__(self, username, password=None, token=None, transport=http_transport):
         """Initialize a Superscription object.
 
         Superfeedr API authentication requires a username and either a :param string password: or a :param string token:. The :param string token: method is recommended. 
@@ -73,13 +191,17 @@ class Superscription(object):
         :param string username: Superfeedr username.
         :param string password: If using password authentication, Superfeedr password
         :param string token: If using token authentication, Superfeedr token. Generate a token from the "Authentication Tokens" ection of your Dashboard.
+        :param callable transport: The callable sending requests, see `http_transport`. Defaults to HTTP.
         .. versionadded:: 0.1.0
+        .. versionchanged:: 0.2.0
+            Added the :param callable transport: argument.
         """
         if not password and not token:
             raise AttributeError("You must initialize the object with either a password or a token! We recommend the token for security purposes, as does Superfeedr!")
         self.password       = password
         self.token          = token
         self.username       = username
+        self.transport      = transport
 
 
     def _construct_payload(self, hub_mode, fmt="json", **kwargs):
@@ -89,44 +211,34 @@ class Superscription(object):
             raise AttributeError("hub_mode must be one of: %s" % str(ALLOWED_MODES.keys()))
 
 
-        payload = {
-            'format'        : fmt,
-            'hub.mode'      : hub_mode,
-        }
+        _check_hub_verify(kwargs)
 
-        hub_verify = kwargs.get("hub_verify", None)
-        if hub_verify and hub_verify not in ["sync", "async"]:
-            raise ValueError("If defined, hub_verify can only accept 'sync' or 'async' as values!")
+        payload, extra = _filter_params(dict(kwargs, fmt=fmt))
+        payload['hub.mode'] = hub_mode
 
-        for key, value in kwargs.items():
-            if value and key in ALLOWED_PARAMS:
-                pkey = ALLOWED_PARAMS[key]
-                payload[pkey] = kwargs.pop(key)
-
-        if kwargs:
-            warn_msg = "Extra arguments passed in function call: %s" % ", ".join(kwargs.keys())
+        if extra:
+            warn_msg = "Extra arguments passed in function call: %s" % ", ".join(extra)
             warnings.warn(warn_msg, RuntimeWarning)
 
         return payload
 
 
-    def _make_request(self, hub_mode, **kwargs): # pragma: no cover
-        """POST the superscription request using ``requests`` module. Return evaluated response.
+    def _make_request(self, hub_mode, payload=None, **kwargs): # pragma: no cover
+        """Send the superscription request using the `transport` (``requests``, by default). Return the response.
+
+        :param string hub_mode: MUST be one of the `ALLOWED_MODES`
+        :param string payload: constructed `ALLOWED_PARAMS`, either a dict or a pre-encoded query
+            string (see `RequestTemplate`). Constructed from the keyword arguments if not given.
 
-        :param string api_call: should be a bound method, extracted from `ALLOWED_MODES`
-        :param string payload: constructed `ALLOWED_PARAMS`
+        Superfeedr accepts the token in place of the password for HTTP Basic authentication.
 
         """
-        api_call = ALLOWED_MODES.get(hub_mode, None)
-        if not api_call:
+        if hub_mode not in ALLOWED_MODES:
             raise ValueError("Invalid value for hub_mode; allowed modes are: %s" % ", ".join(ALLOWED_MODES.keys()))
 
-        payload         = self._construct_payload(hub_mode=hub_mode, **kwargs)
-        response        = api_call( SUPERFEEDR_API_URL, 
-                                    params=payload, 
-                                    auth=auth.HTTPBasicAuth(self.username, self.password), 
-                                    # headers={'Accept': 'application/json'}
-                            )
+        if payload is None:
+            payload     = self._construct_payload(hub_mode=hub_mode, **kwargs)
+        response        = self.transport(hub_mode, payload, auth.HTTPBasicAuth(self.username, self.password or self.token))
         return response
         
     def _super_request(self, hub_mode, **kwargs):
@@ -170,6 +282,51 @@ class Superscription(object):
         return hub_topic
 
 
+    def template(self, hub_mode, fmt="json", **kwargs):
+        """Build a `RequestTemplate` for many requests sharing the same parameters.
+
+        The shared parameters (e.g. `hub_callback`, `hub_secret`, `hub_verify`) are validated and encoded
+        once; use `send` to issue a request for each item. Warnings are also emitted once, here.
+
+        Usage:
+        >>> from superscription import Superscription
+        >>> ss = Superscription(username='demo', password='demo')
+        >>> template = ss.template('subscribe', hub_callback='http://my.domain.tld/callback', hub_secret='RandomHubSecret')
+        >>> ss.send(template, hub_topic='http://push-pub.appspot.com/feed')
+        True
+        """
+        if hub_mode == "subscribe" and not kwargs.get("hub_secret"):
+            warnings.warn("You are strongly recommended to set a hub secret on a per-feed basis!", UserWarning)
+
+        for key in ("hub_topic", "hub_callback"):
+            if kwargs.get(key):
+                self._verify(kwargs[key])
+
+        return RequestTemplate(hub_mode, fmt=fmt, **kwargs)
+
+
+    def send(self, template, **kwargs):
+        """Send a request built from :param RequestTemplate template: and the per-item keyword arguments.
+
+        The per-item arguments are validated like those of the request methods: raises `TypeError` if a
+        parameter required by the mode is set neither by the template nor per item, and `AttributeError`
+        for URLs which aren't fully-qualified.
+
+        Returns True/False and populates the `response` attribute, like the other request methods.
+        """
+        for key in REQUIRED_PARAMS[template.hub_mode]:
+            if not kwargs.get(key) and ALLOWED_PARAMS[key] not in template.fixed:
+                raise TypeError("%s() requires the '%s' argument, in the template or per request" % (template.hub_mode, key))
+
+        hub_topic = kwargs.get("hub_topic")
+        if hub_topic and template.hub_mode in ("subscribe", "unsubscribe"):
+            self.hub_topic = self._verify(hub_topic)
+        if kwargs.get("hub_callback"):
+            self._verify(kwargs["hub_callback"])
+
+        return self._super_request(hub_mode=template.hub_mode, payload=template.encode(**kwargs))
+
+
     def subscribe(self, hub_topic, hub_callback, hub_secret=None, hub_verify=None, retrieve=None):
         """Set up a superfeedr subscription ('superscription') for a feed.
 
@@ -258,10 +415,10 @@ class Superscription(object):
         200
         """
 
-        kwargs          = dict(hub_topic=hub_topic, count=count, before=before, after=after, fmt=fmt, callback=callback)
-        if fmt and fmt is not "json": # pragma: no cover
+        if callback and fmt and fmt != "json":
             warnings.warn("callbacks are supported only for JSON. Ignoring callback...")
             callback = None
+        kwargs          = dict(hub_topic=hub_topic, count=count, before=before, after=after, fmt=fmt, callback=callback)
         return self._super_request(hub_mode="retrieve", **kwargs)
 
 
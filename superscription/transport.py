@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+superscription.transport
+~~~~~~~~~~~~~~~~~~~~~~~~
+Record real Superfeedr requests, and replay them without the network.
+
+A transport is the callable a ``Superscription`` uses to send its requests:
+``transport(hub_mode, payload, auth)`` returning a ``requests.Response``. The
+``RecordingTransport`` wraps another transport and writes every request/response
+pair to a cassette; the ``ReplayTransport`` serves the responses of a cassette,
+optionally with synthetic latency and as many times as a load test needs.
+Requests which raised, e.g. on a timeout, are recorded and raise again on replay.
+
+A cassette is a (optionally gzipped) JSON-lines file: a header line carrying the
+format version, then one line per interaction. Credentials are never recorded:
+the account is not part of the request, and the `hub.secret` parameter is redacted.
+
+:copyright: (c) 2014 Shrikant Joshi
+:license: BSD, See LICENSE for more details.
+"""
+
+import __builtin__
+import base64
+import datetime
+import gzip
+import itertools
+import json
+import random
+import threading
+import time
+import urllib
+import urlparse
+
+from requests import exceptions, models, structures, utils
+
+from .superscription import SUPERFEEDR_API_URL, http_transport
+
+
+CASSETTE_FORMAT     = "superscription-cassette"
+CASSETTE_VERSION    = 2
+REDACTED_PARAMS     = ("hub.secret",)
+REDACTED            = "REDACTED"
+
+
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode)
+    return open(path, mode)
+
+
+def _normalize(payload):
+    """Canonical query string for a payload, whether a dict or a pre-encoded query string.
+
+    The values of `REDACTED_PARAMS` are replaced, so that secrets never end up in a cassette.
+    """
+    if isinstance(payload, basestring):
+        params = urlparse.parse_qsl(payload, keep_blank_values=True)
+    else:
+        params = []
+        for key, value in (payload or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            params.append((key, str(value)))
+    params = [(key, REDACTED if key in REDACTED_PARAMS else value) for key, value in params]
+    return urllib.urlencode(sorted(params))
+
+
+def _message(exception):
+    """The message of an exception as unicode, whether it was given as unicode or as bytes"""
+    try:
+        return unicode(exception)
+    except UnicodeError:
+        return str(exception).decode('utf-8', 'replace')
+
+
+def _exception(error):
+    """Rebuild a recorded exception: a ``requests`` or built-in exception type taking just a message,
+    else a `RuntimeError` naming the recorded type"""
+    exception_type = getattr(exceptions, error['type'], None) or getattr(__builtin__, error['type'], None)
+    if isinstance(exception_type, type) and issubclass(exception_type, Exception):
+        try:
+            return exception_type(error['message'])
+        except TypeError:
+            pass
+    return RuntimeError("%s: %s" % (error['type'], error['message']))
+
+
+class RecordingTransport(object):
+    """Send requests through another transport and record them to a cassette.
+
+    Usage:
+    >>> recorder = RecordingTransport('superfeedr.jsonl.gz')
+    >>> ss = Superscription(username='demo', password='demo', transport=recorder)
+    >>> ss.list('http://my.domain.tld/callback')
+    True
+    >>> recorder.close()
+    """
+
+    def __init__(self, path, transport=http_transport):
+        """Start a new cassette at :param string path:, overwriting any existing file.
+
+        :param string path: Cassette file. It is gzipped if the name ends with `.gz`.
+        :param callable transport: The transport actually sending the requests. Defaults to HTTP.
+        .. versionadded:: 0.2.0
+        """
+        self.path       = path
+        self.transport  = transport
+        self._lock      = threading.Lock()
+        self._file      = _open(path, "wb")
+        self._write(dict(format=CASSETTE_FORMAT, version=CASSETTE_VERSION))
+
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, separators=(',', ':'), sort_keys=True) + "\n")
+        self._file.flush()
+
+
+    def __call__(self, hub_mode, payload, auth):
+        started     = time.time()
+        record      = dict(mode=hub_mode, params=_normalize(payload))
+        try:
+            response = self.transport(hub_mode, payload, auth)
+        except Exception as e:
+            record.update(error=dict(type=type(e).__name__, message=_message(e)), elapsed=round(time.time() - started, 6))
+            with self._lock:
+                self._write(record)
+            raise
+
+        record.update(
+                        status  = response.status_code,
+                        reason  = response.reason,
+                        headers = dict(response.headers),
+                        body    = base64.b64encode(response.content or ""),
+                        elapsed = round(time.time() - started, 6),
+                    )
+        with self._lock:
+            self._write(record)
+        return response
+
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ReplayTransport(object):
+    """Serve the responses recorded in a cassette, without the network.
+
+    Requests are matched on their mode and parameters, the `hub.secret` excepted since it isn't
+    recorded. Recorded exceptions are raised again. With :param bool strict: set to False, a request
+    which wasn't recorded is served the recordings of the same mode in turn instead, so that a handful
+    of recordings can stand in for thousands of distinct topics.
+
+    Usage:
+    >>> replay = ReplayTransport('superfeedr.jsonl.gz', latency=0.05, amplification=None, strict=False)
+    >>> ss = Superscription(username='demo', password='demo', transport=replay)
+    >>> ss.list('http://my.domain.tld/callback')
+    True
+    """
+
+    def __init__(self, path, latency=0, jitter=0, amplification=1, strict=True, recorded_latency=False):
+        """Load the cassette at :param string path:.
+
+        :param float latency: Seconds to wait before serving each response.
+        :param bool recorded_latency: Whether to also wait as long as the recorded request took.
+        :param float jitter: Up to this many extra seconds, picked at random, to wait for each response.
+        :param int amplification: How many times each recorded response may be served. None for no limit.
+        :param bool strict: Whether requests must match a recording exactly, see above.
+        .. versionadded:: 0.2.0
+        """
+        self.latency            = latency
+        self.jitter             = jitter
+        self.amplification      = amplification
+        self.strict             = strict
+        self.recorded_latency   = recorded_latency
+        self.served             = 0
+        self._lock              = threading.Lock()
+        self._recordings        = {}
+        self._by_mode           = {}
+        self._served            = {}
+
+        with _open(path, "rb") as f:
+            header = json.loads(f.readline() or "{}")
+            if header.get("format") != CASSETTE_FORMAT or header.get("version") != CASSETTE_VERSION:
+                raise ValueError("%s is not a version %d superscription cassette!" % (path, CASSETTE_VERSION))
+
+            for index, line in enumerate(f):
+                record = json.loads(line)
+                if 'body' in record:
+                    record['body'] = base64.b64decode(record['body'])
+                record['index'] = index
+                self._recordings.setdefault((record['mode'], record['params']), []).append(record)
+                self._by_mode.setdefault(record['mode'], []).append(record)
+
+        # Cycle over the recordings of each key (and, when not strict, each mode) in recorded order
+        self._cycles = dict((key, itertools.cycle(records)) for key, records in self._recordings.items())
+        self._cycles.update((mode, itertools.cycle(records)) for mode, records in self._by_mode.items())
+
+
+    def _next(self, key):
+        """Next recording for ``key`` which may still be served, or None"""
+        records = self._recordings.get(key) if isinstance(key, tuple) else self._by_mode.get(key)
+        for _ in range(len(records or ())):
+            record = next(self._cycles[key])
+            if self.amplification is None or self._served.get(record['index'], 0) < self.amplification:
+                return record
+        return None
+
+
+    def __call__(self, hub_mode, payload, auth):
+        params  = _normalize(payload)
+        with self._lock:
+            record = self._next((hub_mode, params))
+            if record is None and not self.strict:
+                record = self._next(hub_mode)
+            if record is None:
+                raise LookupError("No recording left to serve for %s %s" % (hub_mode, params))
+            self._served[record['index']] = self._served.get(record['index'], 0) + 1
+            self.served += 1
+
+        delay = self.latency + (random.uniform(0, self.jitter) if self.jitter else 0)
+        if self.recorded_latency:
+            delay += record['elapsed']
+        if delay:
+            time.sleep(delay)
+
+        if 'error' in record:
+            raise _exception(record['error'])
+
+        response                = models.Response()
+        response.status_code    = record['status']
+        response.reason         = record['reason']
+        response.headers        = structures.CaseInsensitiveDict(record['headers'])
+        response.encoding       = utils.get_encoding_from_headers(response.headers)
+        response.url            = "%s/?%s" % (SUPERFEEDR_API_URL, params)
+        response.elapsed        = datetime.timedelta(seconds=delay)
+        response._content       = record['body']
+        return response
@@ -0,0 +1,248 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+superscription.verification
+~~~~~~~~~~~~~~~~~~~~~~~~~~~
+Track subscriptions made with ``hub_verify="async"``.
+
+With asynchronous verification Superfeedr accepts the request straight away and
+verifies the intent later, by sending a challenge to the callback URL. The
+``VerificationTracker`` records every async (un)subscribe, matches the incoming
+challenges against them and lets you wait for, or re-issue, the ones still pending.
+
+:copyright: (c) 2014 Shrikant Joshi
+:license: BSD, See LICENSE for more details.
+"""
+
+import threading
+import time
+
+
+class VerificationTracker(object):
+    """Issue async subscribe/unsubscribe requests and track their verification.
+
+    Usage:
+    >>> tracker = VerificationTracker(Superscription(username='demo', password='demo'))
+    >>> tracker.subscribe('http://push-pub.appspot.com/feed', 'http://my.domain.tld/callback', hub_secret='RandomHubSecret')
+    True
+
+    Or, for many topics at once (in parallel, with a ``ShardedSuperscription``):
+    >>> tracker.bulk_subscribe(topics, 'http://my.domain.tld/callback', hub_secret='RandomHubSecret')
+    {'http://push-pub.appspot.com/feed': True, ...}
+
+    Then, in the handler of 'http://my.domain.tld/callback', echo the challenge back:
+    >>> challenge = tracker.verify(request.args)
+    >>> if challenge is None: return 404
+    >>> return challenge
+
+    And wherever the verification needs to be complete:
+    >>> tracker.wait_all(timeout=60)
+    []
+    """
+
+    def __init__(self, client):
+        """Initialize a VerificationTracker.
+
+        :param client: A ``Superscription`` (or ``ShardedSuperscription``) object used to issue requests.
+        .. versionadded:: 0.2.0
+        """
+        self.client     = client
+        self.verified   = {}
+        self.denied     = {}
+        self._pending   = {}
+        self._condition = threading.Condition()
+
+
+    def _track(self, hub_mode, hub_topic, kwargs):
+        """Record a pending verification, superseding any pending one for the opposite mode"""
+        opposite = "unsubscribe" if hub_mode == "subscribe" else "subscribe"
+        with self._condition:
+            self._pending.pop((opposite, hub_topic), None)
+            for outcome in (self.verified, self.denied):
+                outcome.pop((hub_mode, hub_topic), None)
+            self._pending[(hub_mode, hub_topic)] = dict(kwargs=kwargs, issued_at=time.time())
+
+
+    def _untrack_failed(self, hub_mode, hub_topics, results):
+        with self._condition:
+            for hub_topic in hub_topics:
+                if not results.get(hub_topic):
+                    self._pending.pop((hub_mode, hub_topic), None)
+            self._condition.notify_all()
+
+
+    def _issue(self, hub_mode, hub_topic, kwargs):
+        """Track, then send, an async request. The hub may send the challenge before the request returns."""
+        self._track(hub_mode, hub_topic, kwargs)
+        results = {}
+        try:
+            results[hub_topic] = getattr(self.client, hub_mode)(hub_topic, hub_verify="async", **kwargs)
+        finally:
+            self._untrack_failed(hub_mode, [hub_topic], results)
+        return results[hub_topic]
+
+
+    def _issue_many(self, hub_mode, hub_topics, kwargs):
+        """Track, then send, async requests for many topics.
+
+        Uses the ``bulk_*`` method of the client when it has one, e.g. ``ShardedSuperscription``, and
+        otherwise sends the requests one after the other. Returns the dicts of hub_topic -> True/False
+        and of hub_topic -> exception.
+        """
+        for hub_topic in hub_topics:
+            self._track(hub_mode, hub_topic, kwargs)
+
+        results = {}
+        errors  = {}
+        try:
+            bulk = getattr(self.client, "bulk_%s" % hub_mode, None)
+            if bulk is not None:
+                results = bulk(hub_topics, hub_verify="async", **kwargs)
+                errors.update(getattr(self.client, 'errors', None) or {})
+            else:
+                for hub_topic in hub_topics:
+                    try:
+                        results[hub_topic] = getattr(self.client, hub_mode)(hub_topic, hub_verify="async", **kwargs)
+                    except Exception as e:
+                        errors[hub_topic] = e
+        finally:
+            self._untrack_failed(hub_mode, hub_topics, results)
+        return results, errors
+
+
+    def subscribe(self, hub_topic, hub_callback, hub_secret=None, retrieve=None):
+        """Subscribe with ``hub_verify="async"`` and track the verification. See ``Superscription.subscribe``."""
+        kwargs = dict(hub_callback=hub_callback, hub_secret=hub_secret, retrieve=retrieve)
+        return self._issue("subscribe", hub_topic, kwargs)
+
+
+    def unsubscribe(self, hub_topic, hub_callback=None, hub_secret=None):
+        """Unsubscribe with ``hub_verify="async"`` and track the verification. See ``Superscription.unsubscribe``."""
+        kwargs = dict(hub_callback=hub_callback, hub_secret=hub_secret)
+        return self._issue("unsubscribe", hub_topic, kwargs)
+
+
+    def bulk_subscribe(self, hub_topics, hub_callback, hub_secret=None, retrieve=None):
+        """Subscribe every topic in :param list hub_topics: with ``hub_verify="async"`` and track the verifications.
+
+        Returns a dict of hub_topic -> True/False. The ``errors`` attribute is populated with a dict of
+        hub_topic -> exception for the requests which raised; those topics aren't tracked.
+        """
+        kwargs = dict(hub_callback=hub_callback, hub_secret=hub_secret, retrieve=retrieve)
+        results, self.errors = self._issue_many("subscribe", hub_topics, kwargs)
+        return results
+
+
+    def bulk_unsubscribe(self, hub_topics, hub_callback=None, hub_secret=None):
+        """Unsubscribe every topic in :param list hub_topics: with ``hub_verify="async"`` and track the verifications.
+
+        Returns a dict of hub_topic -> True/False, and populates the ``errors`` attribute like ``bulk_subscribe``.
+        """
+        kwargs = dict(hub_callback=hub_callback, hub_secret=hub_secret)
+        results, self.errors = self._issue_many("unsubscribe", hub_topics, kwargs)
+        return results
+
+
+    def verify(self, params, accept_untracked=False):
+        """Correlate a verification request received on the callback URL with a pending subscription.
+
+        Returns the ``hub.challenge`` to echo back in a 2XX response if the request matches a pending
+        subscribe/unsubscribe, or None if it doesn't, in which case the callback should answer with a 404.
+        A ``denied`` notification marks the pending subscription as denied and also returns None.
+
+        The tracker only knows of the requests it sent itself, and only in memory: after a restart, or for
+        requests sent directly through the client, the challenges are untracked and would be rejected.
+        Set :param bool accept_untracked: to echo their challenge back anyway, i.e. to accept them.
+
+        :param dict params: The query parameters of the request (``hub.mode``, ``hub.topic``,
+            ``hub.challenge``, ...), e.g. ``request.GET`` or ``request.args``.
+        """
+        hub_mode    = params.get("hub.mode")
+        hub_topic   = params.get("hub.topic")
+
+        with self._condition:
+            if hub_mode == "denied":
+                key = ("subscribe", hub_topic)
+                if self._pending.pop(key, None) is None:
+                    return None
+                self.denied[key] = params.get("hub.reason")
+                self._condition.notify_all()
+                return None
+
+            key = (hub_mode, hub_topic)
+            if self._pending.pop(key, None) is None:
+                if accept_untracked and hub_mode in ("subscribe", "unsubscribe"):
+                    return params.get("hub.challenge")
+                return None
+            self.verified[key] = time.time()
+            self._condition.notify_all()
+        return params.get("hub.challenge")
+
+
+    @property
+    def pending(self):
+        """List of ``(hub_mode, hub_topic)`` tuples still awaiting verification"""
+        with self._condition:
+            return self._pending.keys()
+
+
+    def _wait_for(self, predicate, timeout):
+        """Wait until ``predicate()`` is true or :param float timeout: seconds have elapsed"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._condition:
+            while not predicate():
+                if deadline is None:
+                    self._condition.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+
+
+    def wait(self, hub_topic, hub_mode="subscribe", timeout=None):
+        """Block until the (un)subscription of :param string hub_topic: is verified or denied.
+
+        Returns True if it was verified, False if it was denied, not tracked or :param float timeout:
+        seconds elapsed first.
+        """
+        key = (hub_mode, hub_topic)
+        self._wait_for(lambda: key not in self._pending, timeout)
+        with self._condition:
+            return key in self.verified
+
+
+    def wait_all(self, timeout=None):
+        """Block until every tracked (un)subscription is verified or denied, or :param float timeout: seconds elapse.
+
+        Returns the list of ``(hub_mode, hub_topic)`` tuples still pending; empty when all are done.
+        """
+        self._wait_for(lambda: not self._pending, timeout)
+        return self.pending
+
+
+    def reissue(self, older_than=0):
+        """Re-issue the (un)subscriptions that haven't been verified yet.
+
+        Only requests issued more than :param float older_than: seconds ago are re-issued, so that
+        verifications still in flight aren't duplicated. Requests sharing the same arguments are re-issued
+        together, through the ``bulk_*`` method of the client when it has one.
+
+        Returns a dict of ``(hub_mode, hub_topic)`` -> True/False for the re-issued requests. The
+        ``errors`` attribute is populated with a dict of ``(hub_mode, hub_topic)`` -> exception.
+        """
+        cutoff = time.time() - older_than
+        groups = {}
+        with self._condition:
+            for (hub_mode, hub_topic), entry in self._pending.items():
+                if entry['issued_at'] <= cutoff:
+                    groups.setdefault((hub_mode, tuple(sorted(entry['kwargs'].items()))), []).append(hub_topic)
+
+        results = {}
+        self.errors = errors = {}
+        for (hub_mode, kwargs), hub_topics in groups.items():
+            group_results, group_errors = self._issue_many(hub_mode, hub_topics, dict(kwargs))
+            results.update(((hub_mode, hub_topic), result) for hub_topic, result in group_results.items())
+            errors.update(((hub_mode, hub_topic), error) for hub_topic, error in group_errors.items())
+        return results
@@ -0,0 +1,158 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_scheduler
+----------------------------------
+
+Tests for `superscription.scheduler` module.
+"""
+
+import copy
+import time
+import unittest
+import warnings
+
+from superscription import Superscription, ShardedSuperscription, Scheduler, DeadlineExceeded, INTERACTIVE, NORMAL, BULK
+
+from .test_superscription import fake_response
+
+
+def slow_response(hub_mode, **kwargs):
+    time.sleep(0.02)
+    return fake_response(hub_mode)
+
+
+def slower_response(hub_mode, **kwargs):
+    time.sleep(0.2)
+    return fake_response(hub_mode)
+
+
+class TestScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.ss     = Superscription('demo', 'demo')
+        self.ss._make_request = slow_response
+
+        self.url    = 'http://push-pub.appspot.com/feed'
+        self.cburl  = 'http://my.domain.tld/callback/'
+        self.secret = 'RandomHubSecretForTesting'
+        warnings.filterwarnings("error")
+
+    def subscribe(self, scheduler, topic, **kwargs):
+        return scheduler.submit('subscribe', hub_topic=topic, hub_callback=self.cburl, hub_secret=self.secret, **kwargs)
+
+    def test_exceptions(self):
+        with self.assertRaises(ValueError):
+            Scheduler(self.ss, shares={'urgent': 1.0})
+        with self.assertRaises(ValueError):
+            Scheduler(self.ss, workers=1)
+
+        with Scheduler(self.ss, workers=2) as scheduler:
+            with self.assertRaises(AttributeError):
+                scheduler.submit('invalid_mode', hub_topic=self.url)
+            with self.assertRaises(ValueError):
+                scheduler.submit('retrieve', priority='urgent', hub_topic=self.url)
+
+            job = self.subscribe(scheduler, 'http://google')
+            with self.assertRaises(AttributeError):
+                job.result(timeout=5)
+
+        with self.assertRaises(RuntimeError):
+            scheduler.submit('retrieve', hub_topic=self.url)
+
+    def test_submit(self):
+        with Scheduler(self.ss, workers=2) as scheduler:
+            job = self.subscribe(scheduler, self.url)
+            self.assertTrue(job.result(timeout=5))
+            self.assertEqual(job.response.status_code, 204)
+
+            template = self.ss.template('subscribe', hub_callback=self.cburl, hub_secret=self.secret)
+            job = scheduler.submit('send', template=template, hub_topic=self.url)
+            self.assertTrue(job.result(timeout=5))
+
+    def test_limits(self):
+        scheduler = Scheduler(self.ss, workers=4)
+        self.assertEqual(scheduler.limits, {INTERACTIVE: 4, NORMAL: 2, BULK: 1})
+        scheduler.shutdown()
+
+        # Lower classes are clamped so that one worker stays free for interactive requests
+        scheduler = Scheduler(self.ss, workers=2)
+        self.assertEqual(scheduler.limits, {INTERACTIVE: 2, NORMAL: 1, BULK: 1})
+        self.assertEqual(scheduler.background, 1)
+        scheduler.shutdown()
+
+        scheduler = Scheduler(self.ss, workers=4, shares={NORMAL: 1.0, BULK: 1.0})
+        self.assertEqual(scheduler.limits, {INTERACTIVE: 4, NORMAL: 3, BULK: 3})
+        scheduler.shutdown()
+
+    def test_interactive_jumps_the_queue(self):
+        with Scheduler(self.ss, workers=2) as scheduler:
+            bulk = [self.subscribe(scheduler, '%s/%d' % (self.url, i), priority=BULK) for i in range(20)]
+            interactive = scheduler.submit('retrieve', priority=INTERACTIVE, hub_topic=self.url)
+
+            self.assertTrue(interactive.result(timeout=5))
+            self.assertTrue(scheduler.pending(BULK) > 10)
+            # Bulk requests may only ever use one of the two workers, the other one is left for interactive calls
+            self.assertTrue(interactive.started_at - interactive.submitted_at < 0.1)
+        self.assertTrue(all(job.result() for job in bulk))
+
+    def test_interactive_with_normal_and_bulk_queued(self):
+        self.ss._make_request = slower_response
+        with Scheduler(self.ss, workers=2) as scheduler:
+            queued = []
+            for i in range(2):
+                queued.append(self.subscribe(scheduler, '%s/normal/%d' % (self.url, i), priority=NORMAL))
+                queued.append(self.subscribe(scheduler, '%s/bulk/%d' % (self.url, i), priority=BULK))
+            time.sleep(0.05)
+            interactive = scheduler.submit('retrieve', priority=INTERACTIVE, hub_topic=self.url)
+
+            self.assertTrue(interactive.result(timeout=5))
+            # NORMAL and BULK requests together only ever use one of the two workers
+            self.assertTrue(interactive.started_at - interactive.submitted_at < 0.1)
+        self.assertTrue(all(job.result() for job in queued))
+
+    def test_deadline_behind_the_queue_head(self):
+        with Scheduler(self.ss, workers=2) as scheduler:
+            bulk    = [self.subscribe(scheduler, '%s/%d' % (self.url, i), priority=BULK) for i in range(40)]
+            stale   = self.subscribe(scheduler, self.url, priority=BULK, deadline=time.time() + 0.01)
+
+            started = time.time()
+            with self.assertRaises(DeadlineExceeded):
+                stale.result(timeout=5)
+            self.assertTrue(time.time() - started < 0.2)
+            self.assertIsNone(stale.started_at)
+            self.assertTrue(scheduler.pending(BULK) > 20)
+        self.assertTrue(all(job.result() for job in bulk))
+
+    def test_deadline(self):
+        with Scheduler(self.ss, workers=2) as scheduler:
+            first = self.subscribe(scheduler, self.url, priority=BULK)
+            stale = self.subscribe(scheduler, self.url, priority=BULK, deadline=time.time() + 0.001)
+            fresh = self.subscribe(scheduler, self.url, priority=BULK, deadline=time.time() + 60)
+
+            with self.assertRaises(DeadlineExceeded):
+                stale.result(timeout=5)
+            self.assertIsNone(stale.started_at)
+            self.assertTrue(first.result(timeout=5))
+            self.assertTrue(fresh.result(timeout=5))
+
+    def test_deadlines_of_started_jobs_are_released(self):
+        self.ss._make_request = fake_response
+        with Scheduler(self.ss, workers=2) as scheduler:
+            jobs = [self.subscribe(scheduler, '%s/%d' % (self.url, i), priority=BULK, deadline=time.time() + 3600)
+                    for i in range(200)]
+            self.assertTrue(all(job.result(timeout=5) for job in jobs))
+            with scheduler._lock:
+                self.assertTrue(len(scheduler._deadlines) <= 1)
+                self.assertEqual(scheduler._live, 0)
+
+    def test_sharded_client_copy(self):
+        sharded = ShardedSuperscription([('alice', 'a'), ('bob', 'b')])
+        clone   = copy.copy(sharded)
+        for username, client in clone.clients.items():
+            self.assertIsNot(client, sharded.clients[username])
+        self.assertEqual(clone.client_for(self.url).username, sharded.client_for(self.url).username)
+
+    def tearDown(self):
+        warnings.resetwarnings()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_sharding
+----------------------------------
+
+Tests for `superscription.sharding` module.
+"""
+
+import unittest
+import warnings
+
+from superscription import ShardedSuperscription, Superscription
+
+from .test_superscription import fake_response
+
+
+class TestShardedSuperscription(unittest.TestCase):
+
+    def setUp(self):
+        self.credentials    = [('alice', None, 'token-a'), ('bob', 'password-b'), dict(username='carol', token='token-c')]
+        self.sharded        = ShardedSuperscription(self.credentials)
+        for client in self.sharded.clients.values():
+            client._make_request = fake_response
+
+        self.topics = ['http://push-pub.appspot.com/feed/%d' % i for i in range(50)]
+        self.cburl  = 'http://my.domain.tld/callback/'
+        warnings.filterwarnings("error")
+
+    def test_exceptions(self):
+        with self.assertRaises(AttributeError):
+            ShardedSuperscription([])
+        with self.assertRaises(AttributeError):
+            ShardedSuperscription([('alice',)])
+        with self.assertRaises(ValueError):
+            ShardedSuperscription([('alice', 'a'), ('alice', 'b')])
+
+    def test_assignment_is_stable(self):
+        other = ShardedSuperscription(reversed(self.credentials))
+        for topic in self.topics:
+            self.assertEqual(self.sharded.client_for(topic).username, other.client_for(topic).username)
+
+        shards = self.sharded.shard(self.topics)
+        self.assertEqual(sorted(sum(shards.values(), [])), sorted(self.topics))
+        self.assertEqual(len(shards), 3)
+
+    def test_adding_account_moves_few_topics(self):
+        topics  = ['http://feeds.domain.tld/%d' % i for i in range(2000)]
+        before  = dict((topic, self.sharded.client_for(topic).username) for topic in topics)
+
+        self.sharded.add_client(Superscription('dave', token='token-d'))
+        moved   = [topic for topic in topics if self.sharded.client_for(topic).username != before[topic]]
+
+        # Only topics re-assigned to the new account may move, roughly a quarter of them.
+        self.assertTrue(all(self.sharded.client_for(topic).username == 'dave' for topic in moved))
+        self.assertTrue(len(topics) / 8 < len(moved) < len(topics) / 2)
+
+    def test_subscribe_routes_to_owner(self):
+        topic   = self.topics[0]
+        result  = self.sharded.subscribe(topic, self.cburl, hub_secret="RandomHubSecretForTesting")
+        self.assertTrue(result)
+        self.assertEqual(self.sharded.response.status_code, 204)
+        self.assertEqual(self.sharded.client_for(topic).hub_topic, topic)
+
+    def test_bulk_subscribe(self):
+        results = self.sharded.bulk_subscribe(self.topics, self.cburl, hub_secret="RandomHubSecretForTesting")
+        self.assertEqual(sorted(results.keys()), sorted(self.topics))
+        self.assertTrue(all(results.values()))
+        self.assertEqual(self.sharded.errors, {})
+        self.assertEqual(set(response.status_code for response in self.sharded.responses.values()), set([204]))
+
+    def test_bulk_collects_errors(self):
+        results = self.sharded.bulk_subscribe(self.topics + ['http://google'], self.cburl, hub_secret="RandomHubSecretForTesting")
+        self.assertEqual(len(results), len(self.topics))
+        self.assertIsInstance(self.sharded.errors['http://google'], AttributeError)
+
+    def test_auth(self):
+        sent = {}
+
+        def capture_transport(hub_mode, payload, auth):
+            sent[auth.username] = auth.password
+            return fake_response(hub_mode)
+
+        sharded = ShardedSuperscription(self.credentials, transport=capture_transport)
+        sharded.bulk_retrieve(self.topics)
+        self.assertEqual(sent, {'alice': 'token-a', 'bob': 'password-b', 'carol': 'token-c'})
+
+    def test_list(self):
+        results = self.sharded.list(self.cburl)
+        self.assertEqual(results, {'alice': True, 'bob': True, 'carol': True})
+        self.assertEqual(self.sharded.responses['bob'].status_code, 200)
+
+    def tearDown(self):
+        warnings.resetwarnings()
@@ -11,9 +11,10 @@ Tests for `superscription` module.
 import os
 import unittest
 import pickle
+import urlparse
 import warnings
 
-from superscription import Superscription
+from superscription import Superscription, RequestTemplate
 
 
 def fake_response(hub_mode, **kwargs):
@@ -91,6 +92,93 @@ class TestSuperscription(unittest.TestCase):
         payload = self.ss._construct_payload(hub_mode="subscribe", fmt="json", hub_topic=self.url, hub_callback=self.cburl)
         self.assertIsInstance(payload, dict)
 
+        # Allowed arguments without a value are left out, without warnings
+        payload = self.ss._construct_payload("list", hub_callback=self.cburl, page=None)
+        self.assertEqual(payload, {'format': 'json', 'hub.mode': 'list', 'hub.callback': self.cburl})
+        payload = self.ss._construct_payload("retrieve", fmt=None, hub_topic=self.url, count=0, callback=None)
+        self.assertEqual(payload, {'hub.mode': 'retrieve', 'hub.topic': self.url})
+
+    def test_request_template(self):
+        with self.assertRaises(AttributeError):
+            RequestTemplate("invalid_mode", hub_callback=self.cburl)
+        with self.assertRaises(ValueError):
+            RequestTemplate("subscribe", hub_callback=self.cburl, hub_verify="invalid")
+        with self.assertRaises(RuntimeWarning):
+            RequestTemplate("subscribe", hub_callback=self.cburl, foo="foo")
+
+        template = RequestTemplate("subscribe", hub_callback=self.cburl, hub_secret="RandomHubSecretForTesting", hub_verify=None)
+        query = template.encode(hub_topic=self.url, hub_verify=None)
+        self.assertEqual(dict(urlparse.parse_qsl(query)), self.ss._construct_payload("subscribe", "json",
+                            hub_topic=self.url, hub_callback=self.cburl, hub_secret="RandomHubSecretForTesting"))
+
+        with self.assertRaises(TypeError):
+            template.encode(hub_topic=self.url, hub_callback=self.cburl)
+        with self.assertRaises(TypeError):
+            template.encode(hub_topic=self.url, foo="foo")
+
+        self.assertEqual(dict(urlparse.parse_qsl(RequestTemplate("list", hub_callback=self.cburl).encode(page=2)))['page'], '2')
+
+        # Falsy values are left out, just like in _construct_payload
+        falsy = dict(hub_topic=self.url, hub_callback=self.cburl, hub_secret='', retrieve=False)
+        query = RequestTemplate("subscribe", **falsy).encode()
+        self.assertEqual(dict(urlparse.parse_qsl(query)), self.ss._construct_payload("subscribe", **falsy))
+        query = RequestTemplate("retrieve", fmt=None).encode(hub_topic=self.url, count=0, before='')
+        self.assertEqual(dict(urlparse.parse_qsl(query)), self.ss._construct_payload("retrieve", fmt=None, hub_topic=self.url, count=0, before=''))
+
+    def test_send(self):
+        with self.assertRaises(UserWarning):
+            self.ss.template("subscribe", hub_callback=self.cburl)
+        with self.assertRaises(AttributeError):
+            self.ss.template("subscribe", hub_callback="invalid callback url", hub_secret="RandomHubSecretForTesting")
+
+        template = self.ss.template("subscribe", hub_callback=self.cburl, hub_secret="RandomHubSecretForTesting")
+        with self.assertRaises(AttributeError):
+            self.ss.send(template, hub_topic="http://google")
+
+        self.assertTrue(self.ss.send(template, hub_topic=self.url))
+        self.assertEqual(self.ss.hub_topic, self.url)
+        self.assertEqual(self.ss.response.status_code, 204)
+
+    def test_no_warnings_through_transport(self):
+        ss = Superscription('demo', 'demo', transport=lambda hub_mode, payload, auth: fake_response(hub_mode))
+        self.assertTrue(ss.subscribe(self.url, self.cburl, hub_secret="RandomHubSecretForTesting"))
+        self.assertTrue(ss.list(self.cburl))
+        self.assertTrue(ss.retrieve(self.url))
+        self.assertTrue(ss.unsubscribe(self.url))
+
+    def test_retrieve_drops_callback_for_atom(self):
+        sent = []
+
+        def capture_transport(hub_mode, payload, auth):
+            sent.append(payload)
+            return fake_response(hub_mode)
+
+        ss = Superscription('demo', 'demo', transport=capture_transport)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertTrue(ss.retrieve(self.url, fmt='atom', callback='cb'))
+        self.assertEqual(len(caught), 1)
+        self.assertNotIn('callback', sent[-1])
+        self.assertEqual(sent[-1]['format'], 'atom')
+
+        self.assertTrue(ss.retrieve(self.url, fmt='json', callback='cb'))
+        self.assertEqual(sent[-1]['callback'], 'cb')
+
+    def test_send_validates_per_request_arguments(self):
+        template = self.ss.template("subscribe", hub_secret="RandomHubSecretForTesting")
+        with self.assertRaises(TypeError):
+            self.ss.send(template, hub_topic=self.url)
+        with self.assertRaises(AttributeError):
+            self.ss.send(template, hub_topic=self.url, hub_callback="garbage")
+        with self.assertRaises(ValueError):
+            self.ss.send(template, hub_topic=self.url, hub_callback=self.cburl, hub_verify="bogus")
+        self.assertTrue(self.ss.send(template, hub_topic=self.url, hub_callback=self.cburl, hub_verify="async"))
+
+        with self.assertRaises(TypeError):
+            self.ss.send(self.ss.template("list"))
+        with self.assertRaises(TypeError):
+            self.ss.send(self.ss.template("retrieve"), count=5)
+
     def test_subscribe(self):
         with self.assertRaises(UserWarning):
             result = self.ss.subscribe(self.url, self.cburl)
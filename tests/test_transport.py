@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_transport
+----------------------------------
+
+Tests for `superscription.transport` module.
+"""
+
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import unittest
+import warnings
+
+from requests import exceptions
+
+from superscription import Superscription, ShardedSuperscription, RecordingTransport, ReplayTransport
+
+from .test_superscription import fake_response
+
+
+def fake_transport(hub_mode, payload, auth):
+    return fake_response(hub_mode)
+
+
+class FlakyTransport(object):
+    """Raises the given exceptions in turn, then serves the pickled responses"""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+
+    def __call__(self, hub_mode, payload, auth):
+        if self.errors:
+            raise self.errors.pop(0)
+        time.sleep(0.02)
+        return fake_response(hub_mode)
+
+
+class TestTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path   = os.path.join(self.tmpdir, 'cassette.jsonl.gz')
+
+        self.url    = 'http://push-pub.appspot.com/feed'
+        self.cburl  = 'http://my.domain.tld/callback/'
+        self.secret = 'RandomHubSecretForTesting'
+        warnings.filterwarnings("error")
+
+        with RecordingTransport(self.path, transport=fake_transport) as recorder:
+            ss = Superscription('demo', 'demo', transport=recorder)
+            ss.send(ss.template('subscribe', hub_callback=self.cburl, hub_secret=self.secret), hub_topic=self.url)
+            ss.send(ss.template('list'), hub_callback=self.cburl)
+            ss.send(ss.template('retrieve'), hub_topic=self.url)
+
+    def test_replay(self):
+        ss = Superscription('demo', 'demo', transport=ReplayTransport(self.path))
+
+        self.assertTrue(ss.send(ss.template('list'), hub_callback=self.cburl))
+        self.assertEqual(ss.response.status_code, 200)
+        self.assertEqual(ss.response.json(), fake_response('list').json())
+
+        # The same parameters, built without a template, match the same recording
+        self.assertTrue(ss.retrieve(self.url, fmt='json'))
+        self.assertEqual(ss.response.content, fake_response('retrieve').content)
+
+        self.assertTrue(ss.send(ss.template('subscribe', hub_callback=self.cburl, hub_secret=self.secret), hub_topic=self.url))
+        self.assertEqual(ss.response.status_code, 204)
+
+    def test_strict_matching(self):
+        ss = Superscription('demo', 'demo', transport=ReplayTransport(self.path))
+        with self.assertRaises(LookupError):
+            ss.send(ss.template('list'), hub_callback='http://other.domain.tld/callback/')
+        with self.assertRaises(LookupError):
+            ss.send(ss.template('unsubscribe', hub_topic=self.url))
+
+    def test_amplification(self):
+        replay      = ReplayTransport(self.path, amplification=3, strict=False)
+        sharded     = ShardedSuperscription([('alice', 'a'), ('bob', 'b')], transport=replay)
+        topics      = ['%s/%d' % (self.url, i) for i in range(4)]
+
+        results     = sharded.bulk_subscribe(topics, self.cburl, hub_secret=self.secret)
+        self.assertEqual(len(results), 3)
+        self.assertTrue(all(results.values()))
+        self.assertEqual(len(sharded.errors), 1)
+        self.assertIsInstance(sharded.errors.values()[0], LookupError)
+        self.assertEqual(replay.served, 3)
+
+        replay      = ReplayTransport(self.path, amplification=None, strict=False)
+        sharded     = ShardedSuperscription([('alice', 'a'), ('bob', 'b')], transport=replay)
+        topics      = ['%s/%d' % (self.url, i) for i in range(200)]
+        self.assertTrue(all(sharded.bulk_subscribe(topics, self.cburl, hub_secret=self.secret).values()))
+        self.assertEqual(replay.served, 200)
+
+    def test_latency(self):
+        ss      = Superscription('demo', 'demo', transport=ReplayTransport(self.path, latency=0.05))
+        started = time.time()
+        ss.send(ss.template('list'), hub_callback=self.cburl)
+        self.assertTrue(time.time() - started >= 0.05)
+
+    def test_secret_is_redacted(self):
+        with gzip.open(self.path, 'rb') as f:
+            cassette = f.read()
+        self.assertNotIn(self.secret, cassette)
+        self.assertIn('hub.secret=REDACTED', cassette)
+
+        # Requests still match the recording, whatever their secret
+        ss = Superscription('demo', 'demo', transport=ReplayTransport(self.path))
+        self.assertTrue(ss.subscribe(self.url, self.cburl, hub_secret='AnotherHubSecret'))
+
+    def test_errors_are_replayed(self):
+        path = os.path.join(self.tmpdir, 'errors.jsonl')
+        with RecordingTransport(path, transport=FlakyTransport(exceptions.Timeout("timed out"), KeyError("odd"))) as recorder:
+            ss = Superscription('demo', 'demo', transport=recorder)
+            template = ss.template('list')
+            with self.assertRaises(exceptions.Timeout):
+                ss.send(template, hub_callback=self.cburl)
+            with self.assertRaises(KeyError):
+                ss.send(template, hub_callback=self.cburl)
+            self.assertTrue(ss.send(template, hub_callback=self.cburl))
+
+        ss = Superscription('demo', 'demo', transport=ReplayTransport(path))
+        with self.assertRaises(exceptions.Timeout):
+            ss.send(template, hub_callback=self.cburl)
+        with self.assertRaises(KeyError):
+            ss.send(template, hub_callback=self.cburl)
+        # A retry gets the recorded response
+        self.assertTrue(ss.send(template, hub_callback=self.cburl))
+
+        # Messages are recorded as unicode, and exceptions which can't be rebuilt from their type and
+        # message alone replay as a RuntimeError
+        path = os.path.join(self.tmpdir, 'unicode.jsonl')
+        errors = (ValueError(u'caf\xe9'), IOError('caf\xc3\xa9'), UnicodeDecodeError('utf-8', '\xff', 0, 1, 'invalid start byte'))
+        with RecordingTransport(path, transport=FlakyTransport(*errors)) as recorder:
+            ss = Superscription('demo', 'demo', transport=recorder)
+            for error in errors:
+                with self.assertRaises(type(error)):
+                    ss.send(template, hub_callback=self.cburl)
+
+        ss = Superscription('demo', 'demo', transport=ReplayTransport(path))
+        with self.assertRaises(ValueError) as raised:
+            ss.send(template, hub_callback=self.cburl)
+        self.assertEqual(raised.exception.args[0], u'caf\xe9')
+        with self.assertRaises(IOError) as raised:
+            ss.send(template, hub_callback=self.cburl)
+        self.assertEqual(raised.exception.args[0], u'caf\xe9')
+        with self.assertRaises(RuntimeError) as raised:
+            ss.send(template, hub_callback=self.cburl)
+        self.assertTrue(raised.exception.args[0].startswith('UnicodeDecodeError: '))
+
+        # Exception types which aren't from requests or built-in aren't rebuilt
+        path = os.path.join(self.tmpdir, 'unknown.jsonl')
+        with open(path, 'w') as f:
+            f.write('{"format":"superscription-cassette","version":2}\n')
+            f.write('{"elapsed":0,"error":{"message":"boom","type":"system"},"mode":"list","params":"x=1"}\n')
+        ss = Superscription('demo', 'demo', transport=ReplayTransport(path, strict=False))
+        with self.assertRaises(RuntimeError):
+            ss.send(template, hub_callback=self.cburl)
+
+    def test_recorded_latency(self):
+        path = os.path.join(self.tmpdir, 'slow.jsonl')
+        with RecordingTransport(path, transport=FlakyTransport()) as recorder:
+            ss = Superscription('demo', 'demo', transport=recorder)
+            ss.send(ss.template('list'), hub_callback=self.cburl)
+
+        ss      = Superscription('demo', 'demo', transport=ReplayTransport(path, recorded_latency=True))
+        started = time.time()
+        ss.send(ss.template('list'), hub_callback=self.cburl)
+        self.assertTrue(time.time() - started >= 0.02)
+
+    def test_invalid_cassette(self):
+        path = os.path.join(self.tmpdir, 'invalid.jsonl')
+        with open(path, 'w') as f:
+            f.write('{"format": "superscription-cassette", "version": 1}\n')
+        with self.assertRaises(ValueError):
+            ReplayTransport(path)
+
+    def tearDown(self):
+        warnings.resetwarnings()
+        shutil.rmtree(self.tmpdir)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_verification
+----------------------------------
+
+Tests for `superscription.verification` module.
+"""
+
+import threading
+import unittest
+import warnings
+
+from superscription import Superscription, ShardedSuperscription, VerificationTracker
+
+from .test_superscription import fake_response
+
+
+class TestVerificationTracker(unittest.TestCase):
+
+    def setUp(self):
+        self.ss     = Superscription('demo', 'demo')
+        self.ss._make_request = fake_response
+        self.tracker = VerificationTracker(self.ss)
+
+        self.url    = 'http://push-pub.appspot.com/feed'
+        self.cburl  = 'http://my.domain.tld/callback/'
+        self.secret = 'RandomHubSecretForTesting'
+        warnings.filterwarnings("error")
+
+    def challenge(self, hub_mode, hub_topic, challenge="challenge-string"):
+        return {"hub.mode": hub_mode, "hub.topic": hub_topic, "hub.challenge": challenge}
+
+    def test_subscribe_is_tracked(self):
+        self.assertTrue(self.tracker.subscribe(self.url, self.cburl, hub_secret=self.secret))
+        self.assertEqual(self.tracker.pending, [("subscribe", self.url)])
+
+    def test_verify(self):
+        self.tracker.subscribe(self.url, self.cburl, hub_secret=self.secret)
+
+        self.assertIsNone(self.tracker.verify(self.challenge("unsubscribe", self.url)))
+        self.assertIsNone(self.tracker.verify(self.challenge("subscribe", "http://unknown.domain.tld/feed")))
+        self.assertEqual(self.tracker.verify(self.challenge("subscribe", self.url)), "challenge-string")
+
+        self.assertEqual(self.tracker.pending, [])
+        self.assertIn(("subscribe", self.url), self.tracker.verified)
+        # A replayed challenge no longer matches anything
+        self.assertIsNone(self.tracker.verify(self.challenge("subscribe", self.url)))
+
+    def test_denied(self):
+        self.tracker.subscribe(self.url, self.cburl, hub_secret=self.secret)
+        self.assertIsNone(self.tracker.verify({"hub.mode": "denied", "hub.topic": self.url, "hub.reason": "nope"}))
+        self.assertEqual(self.tracker.denied, {("subscribe", self.url): "nope"})
+        self.assertFalse(self.tracker.wait(self.url, timeout=0))
+
+    def test_unsubscribe_supersedes_subscribe(self):
+        self.tracker.subscribe(self.url, self.cburl, hub_secret=self.secret)
+        self.tracker.unsubscribe(self.url, self.cburl, hub_secret=self.secret)
+        self.assertEqual(self.tracker.pending, [("unsubscribe", self.url)])
+
+    def test_wait(self):
+        self.tracker.subscribe(self.url, self.cburl, hub_secret=self.secret)
+        self.assertFalse(self.tracker.wait(self.url, timeout=0.01))
+
+        timer = threading.Timer(0.05, self.tracker.verify, args=(self.challenge("subscribe", self.url),))
+        timer.start()
+        self.assertTrue(self.tracker.wait(self.url, timeout=5))
+        timer.join()
+
+    def test_wait_all(self):
+        topics = ['%s/%d' % (self.url, i) for i in range(10)]
+        for topic in topics:
+            self.tracker.subscribe(topic, self.cburl, hub_secret=self.secret)
+        self.assertEqual(len(self.tracker.wait_all(timeout=0.01)), 10)
+
+        def verify_all():
+            for topic in topics:
+                self.tracker.verify(self.challenge("subscribe", topic))
+
+        thread = threading.Thread(target=verify_all)
+        thread.start()
+        self.assertEqual(self.tracker.wait_all(timeout=5), [])
+        thread.join()
+
+    def test_reissue(self):
+        topics = ['%s/%d' % (self.url, i) for i in range(3)]
+        for topic in topics:
+            self.tracker.subscribe(topic, self.cburl, hub_secret=self.secret)
+        self.tracker.verify(self.challenge("subscribe", topics[0]))
+
+        self.assertEqual(self.tracker.reissue(older_than=3600), {})
+        results = self.tracker.reissue()
+        self.assertEqual(sorted(results.keys()), [("subscribe", topic) for topic in topics[1:]])
+        self.assertTrue(all(results.values()))
+        self.assertEqual(sorted(self.tracker.pending), [("subscribe", topic) for topic in topics[1:]])
+
+    def test_untracked(self):
+        self.assertIsNone(self.tracker.verify(self.challenge("subscribe", self.url)))
+        self.assertEqual(self.tracker.verify(self.challenge("subscribe", self.url), accept_untracked=True), "challenge-string")
+        self.assertIsNone(self.tracker.verify({"hub.mode": "denied", "hub.topic": self.url}, accept_untracked=True))
+
+    def test_bulk_subscribe(self):
+        topics  = ['%s/%d' % (self.url, i) for i in range(5)]
+        results = self.tracker.bulk_subscribe(topics + ['http://google'], self.cburl, hub_secret=self.secret)
+        self.assertEqual(sorted(results.keys()), sorted(topics))
+        self.assertIsInstance(self.tracker.errors['http://google'], AttributeError)
+        self.assertEqual(sorted(self.tracker.pending), [("subscribe", topic) for topic in sorted(topics)])
+
+        self.tracker.bulk_unsubscribe(topics[:2], self.cburl, hub_secret=self.secret)
+        self.assertEqual(len(self.tracker.pending), 5)
+        self.assertIn(("unsubscribe", topics[0]), self.tracker.pending)
+
+    def test_bulk_through_sharded_client(self):
+        sharded = ShardedSuperscription([('alice', 'a'), ('bob', 'b')])
+        for client in sharded.clients.values():
+            client._make_request = fake_response
+
+        calls = []
+        bulk_subscribe = sharded.bulk_subscribe
+
+        def spy(hub_topics, **kwargs):
+            calls.append((list(hub_topics), kwargs['hub_verify']))
+            return bulk_subscribe(hub_topics, **kwargs)
+        sharded.bulk_subscribe = spy
+
+        tracker = VerificationTracker(sharded)
+        topics  = ['%s/%d' % (self.url, i) for i in range(10)]
+        self.assertTrue(all(tracker.bulk_subscribe(topics, self.cburl, hub_secret=self.secret).values()))
+        tracker.verify(self.challenge("subscribe", topics[0]))
+
+        results = tracker.reissue()
+        self.assertEqual(sorted(results.keys()), sorted(("subscribe", topic) for topic in topics[1:]))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(sorted(calls[1][0]), sorted(topics[1:]))
+        self.assertEqual(calls[1][1], "async")
+
+    def tearDown(self):
+        warnings.resetwarnings()